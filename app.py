@@ -1,175 +1,311 @@
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
 import os
-import json
-import pandas as pd
+import hashlib
+import hmac
+import re
 from datetime import date, datetime, timedelta
-import time
+from sheets_core import (
+    BASE_DIR, TABLES, enqueue, enqueue_rows, failed_rows, flush, get_sheet, init_sheet, pending_rows,
+    start_writer,
+)
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Battle Bound Branding", page_icon="🔒", layout="wide")
 
-# --- Session State Initialization ---
-if "username" not in st.session_state:
-    st.session_state["username"] = ""
-if "password" not in st.session_state:
-    st.session_state["password"] = ""
-if "data_backup" not in st.session_state:
-    st.session_state["data_backup"] = {}
-
 # --- Constants ---
-SHEET_ID = '1QsIKLchwTzC0tAhdgT3JE6TFYRqWS-g5ZNyV5HYglCY'
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, 'credentials.json')
+LOGO_FILE = os.path.join(BASE_DIR, 'BBLogo.png')
+MILEAGE_RATE = 0.65 # Reimbursement per mile
+FORMAT_USD = '${:.2f}'.format # Bound once; reused by the trip form and bulk import
+ADMIN_USER = b'admin'
+ADMIN_PW_SHA256 = bytes.fromhex('370833484dc3c406891cae40850764660d106ddbb2ec69413ebc3ea75470900a') # Default; override with st.secrets["admin_pw_sha256"]
+SYNC_TIMEOUT = 15 # Seconds the Sync button waits for queued rows to reach Sheets
+NUMERIC_COLUMNS = ['Hours', 'Starting Odometer', 'Ending Odometer', 'Total Miles'] # Parsed once per fetch
+MONEY_COLUMNS = ['Amount', 'Total Ceiling Value', 'Pay Rate'] # Same, after stripping $ and ,
+MONEY_RE = re.compile(r'[$,]')
+# Money columns stay numeric and are formatted by the browser
+MONEY_COLUMN_CONFIG = {col: st.column_config.NumberColumn(format='dollar') for col in MONEY_COLUMNS + ['Est. Total Pay']}
+DATE_COLUMNS = ['End Date', 'Due Date'] # Parsed to datetime64 once per fetch
+CATEGORY_COLUMNS = ['Status', 'Category', 'Agency', 'Vehicle Type', 'Contract Type', 'Contacted'] # Few distinct values
+CACHE_TTL = 60 # Seconds before logs (Hours, Expenses, Invoices, Mileage) are re-read
+REFERENCE_TTL = 600 # Seconds before the slow-changing sheets below are re-read
+REFERENCE_SHEETS = {'Directory', 'Active_Contracts', 'Pipeline_Contracts', 'Pipeline_Companies'}
+# Worksheets each page fetches together with load_many; also the cache keys invalidate() clears
+PAGE_SHEETS = {
+    'Home': ('Directory', 'Expenses', 'Mileage', 'Active_Contracts'),
+    'Pipeline': ('Pipeline_Contracts', 'Pipeline_Companies'),
+    'Invoices': ('Invoices', 'Active_Contracts'),
+    'Hours': ('Hours', 'Directory', 'Active_Contracts'),
+    'Expenses': ('Active_Contracts', 'Expenses'),
+}
 
 # --- Helper Functions ---
 def get_db_connection():
-    """Establishes connection to Google Sheets with Secrets or Local Fallback."""
-    creds = None
-    
-    # 1. Try Streamlit Secrets
-    if 'gcp_service_account' in st.secrets:
-        try:
-            creds_dict = st.secrets['gcp_service_account']
-            creds = Credentials.from_service_account_info(creds_dict, scopes=SCOPES)
-        except Exception as e:
-            st.error(f"Error loading secrets: {e}")
-
-    # 2. Fallback to Local File
-    if not creds and os.path.exists(SERVICE_ACCOUNT_FILE):
-        try:
-            creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-        except Exception as e:
-            st.error(f"Error loading local credentials: {e}")
-
-    if not creds:
-        st.error("No credentials found! Please set up st.secrets or credentials.json.")
-        return None
-
+    """Returns the shared Google Sheets connection, or None if it cannot be opened."""
     try:
-        client = gspread.authorize(creds)
-        sheet = client.open_by_key(SHEET_ID)
-        return sheet
+        return get_sheet(st.secrets['gcp_service_account'] if 'gcp_service_account' in st.secrets else None)
     except Exception as e:
         st.error(f"Error connecting to Google Sheets: {e}")
         return None
 
-def init_sheet(sheet):
-    """Ensures the necessary worksheets and headers exist."""
-    if not sheet:
-        return
+@st.cache_resource(show_spinner=False)
+def ensure_schema(_sheet):
+    """Runs init_sheet once per process. Errors are not cached, so a 429 is retried next rerun."""
+    init_sheet(_sheet)
+    return True
 
-    tables = {
-        'Directory': ['Name', 'Company', 'Email', 'Phone', 'Address', 'Pay Rate'],
-        'Hours': ['Employee', 'Date', 'Hours', 'Task', 'Contract'],
-        'Expenses': ['Category', 'Amount', 'Date', 'Description', 'Contract'],
-        'Mileage': ['Date', 'License', 'Vehicle', 'Vehicle Type', 'Starting Odometer', 'Ending Odometer', 'Total Miles', 'Reimbursement Amount'],
-        'Pipeline_Contracts': ['Name', 'Notice ID', 'Contract Type', 'Contact Name', 'Contact Email', 'Date Offers Due', 'Inactive Date', 'Publish Date', 'Notes'],
-        'Pipeline_Companies': ['Company Name', 'Contact Name', 'Contact Email', 'Contact Phone', 'Contacted', 'Facebook URL'],
-        'Active_Contracts': ['Contract Name', 'Agency', 'Contract Number', 'Start Date', 'End Date', 'Total Ceiling Value', 'Status', 'Notes'],
-        'Invoices': ['Invoice Number', 'Contract', 'Date Sent', 'Due Date', 'Amount', 'Status', 'Notes']
-    }
-
-    for name, headers in tables.items():
-        try:
-            worksheet = sheet.worksheet(name)
-            # Check if empty and add headers if needed
-            existing_headers = worksheet.row_values(1)
-            if not existing_headers:
-                worksheet.append_row(headers)
-            else:
-                # Check for missing columns and append them if necessary
-                for i, header in enumerate(headers):
-                    if header not in existing_headers:
-                        worksheet.update_cell(1, len(existing_headers) + 1, header)
-                        existing_headers.append(header) 
-                
-        except gspread.WorksheetNotFound:
-            worksheet = sheet.add_worksheet(title=name, rows=100, cols=20)
-            worksheet.append_row(headers)
+def values_to_frame(values):
+    """Builds a DataFrame from raw sheet values, using the first row as the header."""
+    # Imported here, like in the other data helpers, so the login page doesn't load pandas
+    import pandas as pd
 
-@st.cache_data(ttl=60) # Aggressive Caching: 60 seconds
-def load_data(_sheet, worksheet_name):
-    """Fetches data from a worksheet and returns it as a DataFrame. Handles 429 Errors."""
-    if not _sheet:
+    if not values:
         return pd.DataFrame()
-    
-    try:
-        ws = _sheet.worksheet(worksheet_name)
-        data = ws.get_all_records()
-        df = pd.DataFrame(data)
-        
-        # Success! Update the backup in session state
-        st.session_state["data_backup"][worksheet_name] = df
+    # The API trims trailing blank cells, so square every row up to the header width
+    header = values[0]
+    width = len(header)
+    rows = [row[:width] + [''] * (width - len(row)) for row in values[1:]]
+    df = pd.DataFrame(rows, columns=header)
+    # Parse known numeric columns here so the cached frame already holds floats
+    numeric_cols = df.columns.intersection(NUMERIC_COLUMNS)
+    df[numeric_cols] = df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    for col in df.columns.intersection(MONEY_COLUMNS):
+        df[col] = pd.to_numeric(df[col].str.replace(MONEY_RE, '', regex=True), errors='coerce')
+    for col in df.columns.intersection(DATE_COLUMNS):
+        df[col] = pd.to_datetime(df[col], errors='coerce')
+    # Small integer codes instead of one string per cell; equality filters compare codes
+    category_cols = df.columns.intersection(CATEGORY_COLUMNS)
+    df[category_cols] = df[category_cols].astype('category')
+    return df
+
+def with_pending(df, worksheet_name):
+    """Appends rows still in the write queue, so new entries show before Sheets has them."""
+    import pandas as pd
+
+    rows = pending_rows(worksheet_name)
+    if not rows:
         return df
-        
-    except Exception as e:
-        error_str = str(e)
-        # Check for Quota Exceeded / 429
-        if "429" in error_str or "Quota exceeded" in error_str:
-            st.warning(f"🚦 Speed Limit Hit (429). Displaying cached data for {worksheet_name}. Please wait 60s.")
-            # Attempt to return backup
-            if worksheet_name in st.session_state["data_backup"]:
-                return st.session_state["data_backup"][worksheet_name]
-            else:
-                st.error("Quota exceeded and no cached data available.")
-                return pd.DataFrame()
+    header = list(df.columns) or TABLES[worksheet_name]
+    pending_df = values_to_frame([header] + [[str(value) for value in row] for row in rows])
+    return pd.concat([df, pending_df], ignore_index=True)
+
+@st.cache_resource(show_spinner=False)
+def data_backup():
+    """Last good copy of each worksheet, shared by every session for the 429 fallback.
+
+    Keyed by worksheet name, so it never holds more than one frame per tab. Single
+    dict.update/get calls are atomic under the GIL, so sessions can share it without a lock.
+    """
+    return {}
+
+def load_fallback(worksheet_name, error):
+    """Returns the last good copy of a worksheet after a failed fetch. Handles 429 Errors."""
+    import pandas as pd
+
+    # The client already retried with backoff, so a 429 here means the quota is still exhausted
+    if getattr(error, "code", None) == 429:
+        st.warning(f"🚦 Speed Limit Hit (429). Displaying cached data for {worksheet_name}. Please try again in a minute.")
+        # Attempt to return backup
+        backup = data_backup().get(worksheet_name)
+        if backup is not None:
+            return backup
         else:
-            st.error(f"Error loading {worksheet_name}: {e}")
+            st.error("Quota exceeded and no cached data available.")
             return pd.DataFrame()
+    else:
+        st.error(f"Error loading {worksheet_name}: {error}")
+        return pd.DataFrame()
+
+def fetch_sheets(_sheet, worksheet_names):
+    """Fetches several worksheets with one values.batchGet call. Returns {name: DataFrame}. Handles 429 Errors."""
+    import pandas as pd
+
+    if not _sheet:
+        return {name: pd.DataFrame() for name in worksheet_names}
+
+    try:
+        value_ranges = _sheet.values_batch_get([f"'{name}'" for name in worksheet_names])['valueRanges']
+        dfs = {
+            name: values_to_frame(value_range.get('values', []))
+            for name, value_range in zip(worksheet_names, value_ranges)
+        }
+
+        # Success! Update the shared backup
+        data_backup().update(dfs)
+        return dfs
+
+    except Exception as e:
+        return {name: load_fallback(name, e) for name in worksheet_names}
+
+@st.cache_data(ttl=CACHE_TTL)
+def fetch_logs(_sheet, worksheet_names):
+    """Cache bucket for any batch that includes a fast-changing log."""
+    return fetch_sheets(_sheet, worksheet_names)
+
+@st.cache_data(ttl=REFERENCE_TTL)
+def fetch_reference(_sheet, worksheet_names):
+    """Cache bucket for batches made up only of REFERENCE_SHEETS."""
+    return fetch_sheets(_sheet, worksheet_names)
+
+def load_many(sheet, worksheet_names):
+    """Returns {name: DataFrame}, cached for as long as the slowest-changing bucket allows."""
+    cached_fetch = fetch_reference if REFERENCE_SHEETS.issuperset(worksheet_names) else fetch_logs
+    return cached_fetch(sheet, worksheet_names)
+
+def load_data(sheet, worksheet_name):
+    """Fetches a single worksheet and returns it as a DataFrame."""
+    return load_many(sheet, (worksheet_name,))[worksheet_name]
+
+@st.cache_resource(show_spinner=False)
+def load_logo():
+    """Reads the sidebar logo once per process instead of stat-ing and reading it every rerun."""
+    if not os.path.exists(LOGO_FILE):
+        return None
+    with open(LOGO_FILE, 'rb') as f:
+        return f.read()
+
+def saved(message):
+    """Reruns the whole page after a form submit so its tables show the new row, then toasts."""
+    st.session_state["saved_message"] = message
+    st.rerun(scope="app")
 
 def clear_cache():
     st.cache_data.clear()
     st.toast("Cache Cleared! Fetching fresh data...", icon="🔄")
 
+def home_metrics(sheet):
+    """Computes the Home page metrics from its cached batch plus queued rows. Returns plain numbers.
+
+    Not cached itself: the sums are cheap, and a second cache would keep 429 fallback
+    numbers for another CACHE_TTL after load_many recovers.
+    """
+    # Load Data for Metrics (Cached, one batchGet for all four tabs)
+    dfs = {name: with_pending(df, name) for name, df in load_many(sheet, PAGE_SHEETS["Home"]).items()}
+    df_dir = dfs["Directory"]
+    df_exp = dfs["Expenses"]
+    df_mil = dfs["Mileage"]
+    df_active_contracts = dfs["Active_Contracts"]
+
+    # Calculate Metrics
+    active_members = len(df_dir) if not df_dir.empty else 0
+    active_contracts_count = len(df_active_contracts[df_active_contracts['Status'] == 'Active']) if not df_active_contracts.empty and 'Status' in df_active_contracts.columns else 0
+
+    pending_expenses = 0.0
+    if not df_exp.empty and 'Amount' in df_exp.columns:
+        pending_expenses = df_exp['Amount'].sum()
+
+    ytd_mileage = 0.0
+    if not df_mil.empty and 'Total Miles' in df_mil.columns:
+        ytd_mileage = df_mil['Total Miles'].sum()
+
+    return active_contracts_count, active_members, pending_expenses, ytd_mileage
+
+def invalidate(worksheet_name):
+    """Drops only the cached reads that include worksheet_name. Runs on the writer thread."""
+    for names in [(worksheet_name,), *PAGE_SHEETS.values()]:
+        if worksheet_name in names:
+            fetch_logs.clear(None, names)
+            fetch_reference.clear(None, names)
+
 # --- Authentication ---
+@st.cache_resource(show_spinner=False)
+def admin_pw_hash():
+    """Returns the admin password's SHA-256 digest, preferring st.secrets["admin_pw_sha256"].
+
+    Raises ValueError if that secret is set but malformed. Exceptions aren't cached, so a
+    corrected secrets.toml is picked up on the next rerun.
+    """
+    try:
+        secret = st.secrets["admin_pw_sha256"]
+    except (KeyError, FileNotFoundError):
+        return ADMIN_PW_SHA256
+
+    try:
+        digest = bytes.fromhex(secret)
+    except (TypeError, ValueError):
+        digest = b''
+    if len(digest) != hashlib.sha256().digest_size:
+        raise ValueError('st.secrets["admin_pw_sha256"] must be a SHA-256 digest written as 64 hex characters.')
+    return digest
+
+def password_entered():
+    """Checks whether a password entered by the user is correct."""
+    user = st.session_state.get("username", "")
+    pw_hash = hashlib.sha256(st.session_state.get("password", "").encode('utf-8')).digest()
+    # Never keep the typed password around, whatever the outcome
+    st.session_state["password"] = ""
+
+    # Constant-time compares; bitwise & so both always run (no short-circuit timing leak)
+    if hmac.compare_digest(user.encode('utf-8'), ADMIN_USER) & hmac.compare_digest(pw_hash, admin_pw_hash()):
+        st.session_state["password_correct"] = True
+        st.session_state["login_failed"] = False
+        st.session_state["username"] = ""
+    else:
+        st.session_state["password_correct"] = False
+        st.session_state["login_failed"] = True
+
 def check_password():
     """Returns `True` if the user had a correct password."""
-
-    def password_entered():
-        """Checks whether a password entered by the user is correct."""
-        user = st.session_state.get("username", "")
-        pw = st.session_state.get("password", "")
-        
-        if user == "admin" and pw == "battlebound2025":
-            st.session_state["password_correct"] = True
-            st.session_state["username"] = "" 
-            st.session_state["password"] = ""
-        else:
-            st.session_state["password_correct"] = False
+    # Session state lives server-side, so an authenticated rerun is a single dict lookup
+    if st.session_state.get("password_correct"):
+        return True
 
     if "password_correct" not in st.session_state:
         st.session_state["password_correct"] = False
+    if "username" not in st.session_state:
+        st.session_state["username"] = ""
+    if "password" not in st.session_state:
+        st.session_state["password"] = ""
+
+    login_form()
+    return False
+
+@st.fragment
+def login_form():
+    """Login widgets. Typing and failed attempts rerun only this fragment, not the whole app."""
+    # A malformed secret disables login rather than silently accepting the default password
+    try:
+        admin_pw_hash()
+    except ValueError as e:
+        st.error(f"⚙️ Login is misconfigured: {e}")
+        return
 
-    if not st.session_state["password_correct"]:
-        st.text_input("Username", key="username")
-        st.text_input("Password", type="password", key="password")
-        st.button("Login", on_click=password_entered)
-        
-        if st.session_state.get("password_correct") is False:
-            if st.session_state.get("username") or st.session_state.get("password"):
-                st.error("😕 User not known or password incorrect")
-        return False
-    
-    return True
+    st.text_input("Username", key="username")
+    st.text_input("Password", type="password", key="password")
+    st.button("Login", on_click=password_entered)
+
+    if st.session_state.get("password_correct"):
+        st.rerun()
+    if st.session_state.get("login_failed"):
+        st.error("😕 User not known or password incorrect")
 
 # --- Main App Logic ---
 if check_password():
+    # Imported only once logged in, so the login page renders without loading pandas/numpy.
+    # The helpers above import pandas themselves, so none of them relies on these names.
+    import numpy as np
+    import pandas as pd
+
+    if "saved_message" in st.session_state:
+        st.toast(st.session_state.pop("saved_message"), icon="✅")
+
     # Initialize Sheet
     sheet = get_db_connection()
-    # Only init_sheet on first load to save quota, or handle errors gracefully
-    if sheet:
+    # Only init_sheet on first load to save quota, or handle errors gracefully.
+    # ensure_schema runs once per process; the sentinel skips even that lookup on later reruns.
+    if sheet and not st.session_state.get("_schema_verified"):
         try:
-            init_sheet(sheet)
+            ensure_schema(sheet)
+            st.session_state["_schema_verified"] = True
         except Exception as e:
             if "429" in str(e):
                 st.warning("Could not verify sheet structure due to quota limits. Proceeding with cached data.")
+        # No-op after the first run; queued rows invalidate cached reads once they land
+        start_writer(sheet, on_written=invalidate)
 
     # --- Sidebar ---
-    if os.path.exists("BBLogo.png"):
-        st.sidebar.image("BBLogo.png", use_container_width=True)
+    logo = load_logo()
+    if logo:
+        st.sidebar.image(logo, use_container_width=True)
     else:
         st.sidebar.title("Battle Bound Branding")
         
@@ -177,6 +313,19 @@ if check_password():
     page = st.sidebar.radio("Navigate", ["Home", "Pipeline", "Active Contracts", "Invoices", "Directory", "Hours", "Expenses", "Mileage"])
     
     st.sidebar.markdown("---")
+    if st.sidebar.button("⏫ Sync"):
+        # Wait for the writer to send everything queued; it invalidates each sheet it writes
+        with st.spinner("Syncing with Google Sheets..."):
+            synced = flush(timeout=SYNC_TIMEOUT)
+        if not synced:
+            st.toast("Some rows are still waiting to sync; they will keep retrying.", icon="⏳")
+        failed = failed_rows()
+        if failed:
+            st.sidebar.error(
+                f"{len(failed)} row(s) were not synced because Sheets rejected them or may already have them. "
+                "Check the 'failed' table in pending_writes.db before re-entering them."
+            )
+
     if st.sidebar.button("🔄 Refresh Data"):
         clear_cache()
         st.rerun()
@@ -191,25 +340,8 @@ if check_password():
         st.subheader("Company Operation Center")
         st.divider()
         
-        # Load Data for Metrics (Cached)
-        df_dir = load_data(sheet, "Directory")
-        df_exp = load_data(sheet, "Expenses")
-        df_mil = load_data(sheet, "Mileage")
-        df_active_contracts = load_data(sheet, "Active_Contracts")
-        
-        # Calculate Metrics
-        active_members = len(df_dir) if not df_dir.empty else 0
-        active_contracts_count = len(df_active_contracts[df_active_contracts['Status'] == 'Active']) if not df_active_contracts.empty and 'Status' in df_active_contracts.columns else 0
-        
-        pending_expenses = 0.0
-        if not df_exp.empty and 'Amount' in df_exp.columns:
-            if df_exp['Amount'].dtype == object:
-                 df_exp['Amount'] = df_exp['Amount'].replace('[\$,]', '', regex=True).astype(float)
-            pending_expenses = df_exp['Amount'].sum()
-            
-        ytd_mileage = 0.0
-        if not df_mil.empty and 'Total Miles' in df_mil.columns:
-             ytd_mileage = pd.to_numeric(df_mil['Total Miles'], errors='coerce').sum()
+        # Metrics come from the cached Home batch; the sums themselves are cheap enough to redo
+        active_contracts_count, active_members, pending_expenses, ytd_mileage = home_metrics(sheet)
 
         # Display Metrics
         col1, col2, col3, col4 = st.columns(4)
@@ -228,44 +360,50 @@ if check_password():
         pipeline_type = st.radio("Select Pipeline Type", ["Track Contract", "Track Company"], horizontal=True)
         st.divider()
 
+        # Both tabs in one batchGet, so switching pipeline type is served from cache
+        dfs = load_many(sheet, PAGE_SHEETS["Pipeline"])
+
         if pipeline_type == "Track Contract":
             st.subheader("📝 New Contract Opportunity")
-            with st.form("pipeline_contract_form", clear_on_submit=True):
-                col1, col2 = st.columns(2)
-                name = col1.text_input("Opportunity Name")
-                notice_id = col2.text_input("Notice ID")
+            # Forms run as fragments: typing and failed submits rerun just the form, while a
+            # successful save reruns the page through saved() so the tables below pick up the row
+            @st.fragment
+            def pipeline_contract_form():
+                with st.form("pipeline_contract_form", clear_on_submit=True):
+                    col1, col2 = st.columns(2)
+                    name = col1.text_input("Opportunity Name")
+                    notice_id = col2.text_input("Notice ID")
                 
-                col3, col4 = st.columns(2)
-                contract_type = col3.selectbox("Contract Type", ["Federal", "State", "Commercial", "Sub-Contract", "Other"])
-                contact_name = col4.text_input("Point of Contact Name")
-                contact_email = st.text_input("Point of Contact Email")
+                    col3, col4 = st.columns(2)
+                    contract_type = col3.selectbox("Contract Type", ["Federal", "State", "Commercial", "Sub-Contract", "Other"])
+                    contact_name = col4.text_input("Point of Contact Name")
+                    contact_email = st.text_input("Point of Contact Email")
                 
-                col5, col6, col7 = st.columns(3)
-                offers_due = col5.date_input("Date Offers Due", date.today())
-                inactive_date = col6.date_input("Inactive Date", date.today())
-                publish_date = col7.date_input("Publish Date", date.today())
+                    col5, col6, col7 = st.columns(3)
+                    offers_due = col5.date_input("Date Offers Due", date.today())
+                    inactive_date = col6.date_input("Inactive Date", date.today())
+                    publish_date = col7.date_input("Publish Date", date.today())
                 
-                notes = st.text_area("Notes / Description")
+                    notes = st.text_area("Notes / Description")
                 
-                submitted = st.form_submit_button("Add to Pipeline")
-                if submitted and name:
-                    if sheet:
-                        try:
-                            ws = sheet.worksheet('Pipeline_Contracts')
-                            ws.append_row([
-                                name, notice_id, contract_type, contact_name, contact_email, 
-                                str(offers_due), str(inactive_date), str(publish_date), notes
-                            ])
-                            st.success("Contract Opportunity Added!")
-                            clear_cache()
-                        except Exception as e:
-                            st.error(f"Error saving: {e}")
-                    else:
-                         st.warning("Saved locally (No DB connection)")
+                    submitted = st.form_submit_button("Add to Pipeline")
+                    if submitted and name:
+                        if sheet:
+                            try:
+                                enqueue(sheet, 'Pipeline_Contracts', [
+                                    name, notice_id, contract_type, contact_name, contact_email, 
+                                    str(offers_due), str(inactive_date), str(publish_date), notes
+                                ])
+                                saved("Contract Opportunity Added!")
+                            except Exception as e:
+                                st.error(f"Error saving: {e}")
+                        else:
+                             st.warning("Saved locally (No DB connection)")
+            pipeline_contract_form()
             
             # Show Data
             st.subheader("📊 Existing Opportunities")
-            df = load_data(sheet, "Pipeline_Contracts")
+            df = with_pending(dfs["Pipeline_Contracts"], "Pipeline_Contracts")
             if not df.empty:
                 st.dataframe(df, use_container_width=True)
             else:
@@ -273,38 +411,39 @@ if check_password():
 
         elif pipeline_type == "Track Company":
             st.subheader("🏢 New Company Lead")
-            with st.form("pipeline_company_form", clear_on_submit=True):
-                col1, col2 = st.columns(2)
-                company_name = col1.text_input("Company Name")
-                contact_name = col2.text_input("Contact Name")
+            @st.fragment
+            def pipeline_company_form():
+                with st.form("pipeline_company_form", clear_on_submit=True):
+                    col1, col2 = st.columns(2)
+                    company_name = col1.text_input("Company Name")
+                    contact_name = col2.text_input("Contact Name")
                 
-                col3, col4 = st.columns(2)
-                contact_email = col3.text_input("Contact Email")
-                contact_phone = col4.text_input("Contact Phone")
+                    col3, col4 = st.columns(2)
+                    contact_email = col3.text_input("Contact Email")
+                    contact_phone = col4.text_input("Contact Phone")
                 
-                col5, col6 = st.columns(2)
-                contacted = col5.selectbox("Has been contacted?", ["No", "Yes"])
-                fb_url = col6.text_input("Facebook URL")
+                    col5, col6 = st.columns(2)
+                    contacted = col5.selectbox("Has been contacted?", ["No", "Yes"])
+                    fb_url = col6.text_input("Facebook URL")
                 
-                submitted = st.form_submit_button("Add Company Lead")
-                if submitted and company_name:
-                    if sheet:
-                        try:
-                            ws = sheet.worksheet('Pipeline_Companies')
-                            ws.append_row([
-                                company_name, contact_name, contact_email, contact_phone, 
-                                contacted, fb_url
-                            ])
-                            st.success("Company Lead Added!")
-                            clear_cache()
-                        except Exception as e:
-                            st.error(f"Error saving: {e}")
-                    else:
-                        st.warning("Saved locally (No DB connection)")
+                    submitted = st.form_submit_button("Add Company Lead")
+                    if submitted and company_name:
+                        if sheet:
+                            try:
+                                enqueue(sheet, 'Pipeline_Companies', [
+                                    company_name, contact_name, contact_email, contact_phone, 
+                                    contacted, fb_url
+                                ])
+                                saved("Company Lead Added!")
+                            except Exception as e:
+                                st.error(f"Error saving: {e}")
+                        else:
+                            st.warning("Saved locally (No DB connection)")
+            pipeline_company_form()
 
             # Show Data
             st.subheader("📇 Company Leads")
-            df = load_data(sheet, "Pipeline_Companies")
+            df = with_pending(dfs["Pipeline_Companies"], "Pipeline_Companies")
             if not df.empty:
                 st.dataframe(df, use_container_width=True)
             else:
@@ -315,25 +454,21 @@ if check_password():
         st.title("📜 Active Contracts")
         
         # Metrics
-        df_active = load_data(sheet, "Active_Contracts")
+        df_active = with_pending(load_data(sheet, "Active_Contracts"), "Active_Contracts")
         
         total_value = 0.0
         days_remaining = "N/A"
         
         if not df_active.empty:
             if 'Total Ceiling Value' in df_active.columns:
-                 if df_active['Total Ceiling Value'].dtype == object:
-                     vals = df_active['Total Ceiling Value'].replace('[\$,]', '', regex=True)
-                     total_value = pd.to_numeric(vals, errors='coerce').sum()
-                 else:
-                     total_value = df_active['Total Ceiling Value'].sum()
+                 total_value = df_active['Total Ceiling Value'].sum()
             
             if 'End Date' in df_active.columns:
-                df_active['End Date'] = pd.to_datetime(df_active['End Date'], errors='coerce')
-                today = pd.to_datetime(date.today())
-                future_dates = df_active[df_active['End Date'] > today]['End Date']
-                if not future_dates.empty:
-                    min_days = (future_dates.min() - today).days
+                end_dates = df_active['End Date'].to_numpy(dtype='datetime64[D]')
+                today64 = np.datetime64(date.today(), 'D')
+                future_dates = end_dates[end_dates > today64]
+                if future_dates.size:
+                    min_days = int((future_dates.min() - today64).astype(int))
                     days_remaining = f"{min_days} Days"
 
         col1, col2 = st.columns(2)
@@ -344,44 +479,43 @@ if check_password():
         
         # Add Contract Form
         st.subheader("➕ Add New Contract")
-        with st.form("active_contracts_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            contract_name = col1.text_input("Contract Name")
-            agency = col2.text_input("Agency (e.g., VA, DoD)")
+        @st.fragment
+        def active_contracts_form():
+            with st.form("active_contracts_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                contract_name = col1.text_input("Contract Name")
+                agency = col2.text_input("Agency (e.g., VA, DoD)")
             
-            col3, col4 = st.columns(2)
-            contract_number = col3.text_input("Contract Number")
-            status = col4.selectbox("Status", ["Active", "Paused", "Completed"])
+                col3, col4 = st.columns(2)
+                contract_number = col3.text_input("Contract Number")
+                status = col4.selectbox("Status", ["Active", "Paused", "Completed"])
             
-            col5, col6, col7 = st.columns(3)
-            start_date = col5.date_input("Start Date", date.today())
-            end_date = col6.date_input("End Date", date.today())
-            ceiling_value = col7.number_input("Total Ceiling Value ($)", min_value=0.0, step=1000.0)
+                col5, col6, col7 = st.columns(3)
+                start_date = col5.date_input("Start Date", date.today())
+                end_date = col6.date_input("End Date", date.today())
+                ceiling_value = col7.number_input("Total Ceiling Value ($)", min_value=0.0, step=1000.0)
             
-            notes = st.text_area("Notes")
+                notes = st.text_area("Notes")
             
-            submitted = st.form_submit_button("Activate Contract")
-            if submitted and contract_name:
-                if sheet:
-                    try:
-                        ws = sheet.worksheet('Active_Contracts')
-                        ws.append_row([
-                            contract_name, agency, contract_number, 
-                            str(start_date), str(end_date), ceiling_value, status, notes
-                        ])
-                        st.success("Contract Activated!")
-                        clear_cache()
-                    except Exception as e:
-                        st.error(f"Error saving: {e}")
-                else:
-                    st.warning("Saved locally (No DB connection)")
+                submitted = st.form_submit_button("Activate Contract")
+                if submitted and contract_name:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Active_Contracts', [
+                                contract_name, agency, contract_number, 
+                                str(start_date), str(end_date), ceiling_value, status, notes
+                            ])
+                            saved("Contract Activated!")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+                    else:
+                        st.warning("Saved locally (No DB connection)")
+        active_contracts_form()
         
         # Show Data
         st.subheader("📋 Active Contracts List")
         if not df_active.empty:
-            if 'End Date' in df_active.columns:
-                 df_active['End Date'] = df_active['End Date'].dt.date
-            st.dataframe(df_active, use_container_width=True)
+            st.dataframe(df_active, use_container_width=True, column_config={**MONEY_COLUMN_CONFIG, 'End Date': st.column_config.DateColumn()})
         else:
             st.info("No active contracts found.")
 
@@ -390,8 +524,9 @@ if check_password():
         st.title("💸 Invoicing & Revenue")
         
         # Load Data
-        df_invoices = load_data(sheet, "Invoices")
-        df_active = load_data(sheet, "Active_Contracts")
+        dfs = load_many(sheet, PAGE_SHEETS["Invoices"])
+        df_invoices = with_pending(dfs["Invoices"], "Invoices")
+        df_active = with_pending(dfs["Active_Contracts"], "Active_Contracts")
         
         # Metrics Calculation
         outstanding_revenue = 0.0
@@ -399,21 +534,20 @@ if check_password():
         overdue_count = 0
         
         if not df_invoices.empty:
-            if 'Amount' in df_invoices.columns:
-                if df_invoices['Amount'].dtype == object:
-                    df_invoices['Amount'] = df_invoices['Amount'].replace('[\$,]', '', regex=True).astype(float)
-            
-            if 'Due Date' in df_invoices.columns:
-                df_invoices['Due Date'] = pd.to_datetime(df_invoices['Due Date'], errors='coerce')
-            
-            outstanding_revenue = df_invoices[df_invoices['Status'] == 'Sent']['Amount'].sum()
-            collected_ytd = df_invoices[df_invoices['Status'] == 'Paid']['Amount'].sum()
+            # Derived series only; the frame itself is left as loaded.
+            # A missing column reads as blank so a renamed header doesn't break the page
+            columns = df_invoices.columns
+            due_dates = df_invoices['Due Date'] if 'Due Date' in columns else pd.Series(pd.NaT, index=df_invoices.index, dtype='datetime64[ns]')
+            status = df_invoices['Status'] if 'Status' in columns else pd.Series('', index=df_invoices.index)
+            amounts = df_invoices['Amount'] if 'Amount' in columns else pd.Series(0.0, index=df_invoices.index)
             
-            today = pd.to_datetime(date.today())
-            overdue_mask = (df_invoices['Status'] != 'Paid') & (df_invoices['Status'] != 'Cancelled') & (df_invoices['Due Date'] < today)
-            overdue_count = overdue_mask.sum()
+            outstanding_revenue = amounts[status == 'Sent'].sum()
+            collected_ytd = amounts[status == 'Paid'].sum()
             
-            df_invoices.loc[overdue_mask, 'Status'] = '⚠️ OVERDUE'
+            # isin on the categorical Status matches codes; NaT compares False against today
+            today64 = np.datetime64(date.today())
+            overdue_mask = ~status.isin(('Paid', 'Cancelled')).to_numpy() & (due_dates.to_numpy() < today64)
+            overdue_count = int(overdue_mask.sum())
 
         col1, col2, col3 = st.columns(3)
         col1.metric("Outstanding Revenue", f"${outstanding_revenue:,.2f}")
@@ -424,52 +558,57 @@ if check_password():
         
         # Add Invoice Form
         st.subheader("🧾 Create Invoice")
-        with st.form("invoice_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            invoice_number = col1.text_input("Invoice Number")
+        @st.fragment
+        def invoice_form():
+            with st.form("invoice_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                invoice_number = col1.text_input("Invoice Number")
             
-            # Dropdown for Contract (Cached)
-            if not df_active.empty and 'Contract Name' in df_active.columns:
-                contract = col2.selectbox("Contract", df_active['Contract Name'].sort_values().unique())
-            else:
-                contract = col2.text_input("Contract")
+                # Dropdown for Contract (Cached)
+                if not df_active.empty and 'Contract Name' in df_active.columns:
+                    contract = col2.selectbox("Contract", np.unique(df_active['Contract Name'].dropna()))
+                else:
+                    contract = col2.text_input("Contract")
             
-            col3, col4 = st.columns(2)
-            date_sent = col3.date_input("Date Sent", date.today())
-            due_date = col4.date_input("Due Date", date.today() + timedelta(days=30))
+                col3, col4 = st.columns(2)
+                date_sent = col3.date_input("Date Sent", date.today())
+                due_date = col4.date_input("Due Date", date.today() + timedelta(days=30))
             
-            col5, col6 = st.columns(2)
-            amount = col5.number_input("Amount ($)", min_value=0.0, step=100.0)
-            status = col6.selectbox("Status", ["Draft", "Sent", "Paid", "Overdue", "Cancelled"])
+                col5, col6 = st.columns(2)
+                amount = col5.number_input("Amount ($)", min_value=0.0, step=100.0)
+                status = col6.selectbox("Status", ["Draft", "Sent", "Paid", "Overdue", "Cancelled"])
             
-            notes = st.text_area("Notes")
+                notes = st.text_area("Notes")
             
-            submitted = st.form_submit_button("Save Invoice")
-            if submitted and invoice_number:
-                if sheet:
-                    try:
-                        ws = sheet.worksheet('Invoices')
-                        ws.append_row([
-                            invoice_number, contract, str(date_sent), str(due_date), 
-                            amount, status, notes
-                        ])
-                        st.success("Invoice Saved!")
-                        clear_cache()
-                    except Exception as e:
-                        st.error(f"Error saving: {e}")
-                else:
-                    st.warning("Saved locally (No DB connection)")
+                submitted = st.form_submit_button("Save Invoice")
+                if submitted and invoice_number:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Invoices', [
+                                invoice_number, contract, str(date_sent), str(due_date), 
+                                amount, status, notes
+                            ])
+                            saved("Invoice Saved!")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+                    else:
+                        st.warning("Saved locally (No DB connection)")
+        invoice_form()
         
         # Show Data
         st.subheader("🗂 Invoice Log")
         if not df_invoices.empty:
-            if 'Due Date' in df_invoices.columns:
-                 df_invoices['Due Date'] = df_invoices['Due Date'].dt.date
-            if 'Date Sent' in df_invoices.columns:
-                 df_invoices['Date Sent'] = pd.to_datetime(df_invoices['Date Sent'], errors='coerce').dt.date
-                 
-            df_invoices = df_invoices.sort_values('Due Date', ascending=False)
-            st.dataframe(df_invoices, use_container_width=True)
+            display = {}
+            if 'Status' in columns:
+                display['Status'] = np.where(overdue_mask, '⚠️ OVERDUE', status)
+            if 'Due Date' in columns:
+                display['Due Date'] = due_dates.dt.date
+            if 'Date Sent' in columns:
+                display['Date Sent'] = pd.to_datetime(df_invoices['Date Sent'], errors='coerce').dt.date
+            view = df_invoices.assign(**display)
+            # Newest due date first, blanks last; equal dates keep the sheet's order
+            order = due_dates.sort_values(ascending=False, na_position='last', kind='stable').index
+            st.dataframe(view.loc[order], use_container_width=True, column_config=MONEY_COLUMN_CONFIG)
         else:
             st.info("No invoices found.")
 
@@ -477,34 +616,35 @@ if check_password():
     elif page == "Directory":
         st.title("👥 Directory")
         
-        with st.form("directory_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            name = col1.text_input("Full Name")
-            company = col2.text_input("Company")
-            email = col1.text_input("Email")
-            phone = col2.text_input("Phone")
-            address = st.text_area("Address")
-            pay_rate = col1.number_input("Hourly Pay Rate ($)", min_value=0.0, step=0.5)
+        @st.fragment
+        def directory_form():
+            with st.form("directory_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                name = col1.text_input("Full Name")
+                company = col2.text_input("Company")
+                email = col1.text_input("Email")
+                phone = col2.text_input("Phone")
+                address = st.text_area("Address")
+                pay_rate = col1.number_input("Hourly Pay Rate ($)", min_value=0.0, step=0.5)
             
-            submitted = st.form_submit_button("Save Contact")
-            if submitted and name:
-                if sheet:
-                    try:
-                        ws = sheet.worksheet('Directory')
-                        ws.append_row([name, company, email, phone, address, pay_rate])
-                        st.success("Contact Saved!")
-                        clear_cache()
-                    except Exception as e:
-                        st.error(f"Error saving: {e}")
-                else:
-                    st.warning("Saved locally (No DB connection)")
+                submitted = st.form_submit_button("Save Contact")
+                if submitted and name:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Directory', [name, company, email, phone, address, pay_rate])
+                            saved("Contact Saved!")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+                    else:
+                        st.warning("Saved locally (No DB connection)")
+        directory_form()
 
         # Show Data
-        df = load_data(sheet, "Directory")
+        df = with_pending(load_data(sheet, "Directory"), "Directory")
         if not df.empty:
             if 'Name' in df.columns:
                 df = df.sort_values('Name')
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(df, use_container_width=True, column_config=MONEY_COLUMN_CONFIG)
         else:
             st.info("No contacts found.")
 
@@ -515,28 +655,28 @@ if check_password():
         # 1. Payroll Summary Section
         st.subheader("💰 Payroll Summary")
         
-        df_hours = load_data(sheet, "Hours")
-        df_dir = load_data(sheet, "Directory")
-        df_active = load_data(sheet, "Active_Contracts")
+        dfs = load_many(sheet, PAGE_SHEETS["Hours"])
+        df_hours = with_pending(dfs["Hours"], "Hours")
+        df_dir = with_pending(dfs["Directory"], "Directory")
+        df_active = with_pending(dfs["Active_Contracts"], "Active_Contracts")
         
         if not df_hours.empty and not df_dir.empty:
-            df_hours['Hours'] = pd.to_numeric(df_hours['Hours'], errors='coerce').fillna(0)
-            
-            payroll = df_hours.groupby('Employee')['Hours'].sum().reset_index()
-            payroll.columns = ['Employee', 'Total Hours']
+            # Index-aligned on employee name: one groupby, one reindex, no merge
+            total_hours = df_hours['Hours'].groupby(df_hours['Employee']).sum()
+            payroll = total_hours.rename('Total Hours').rename_axis('Employee').reset_index()
             
             if 'Name' in df_dir.columns and 'Pay Rate' in df_dir.columns:
-                df_dir['Pay Rate'] = pd.to_numeric(df_dir['Pay Rate'], errors='coerce').fillna(0)
+                pay_rates = df_dir.drop_duplicates('Name').set_index('Name')['Pay Rate']
+                pay_rate = pay_rates.reindex(total_hours.index).fillna(0.0)
                 
-                merged = pd.merge(payroll, df_dir[['Name', 'Pay Rate']], left_on='Employee', right_on='Name', how='left')
-                merged['Pay Rate'] = merged['Pay Rate'].fillna(0)
-                merged['Est. Total Pay'] = merged['Total Hours'] * merged['Pay Rate']
+                display_df = pd.DataFrame({
+                    'Employee': total_hours.index,
+                    'Total Hours': total_hours.to_numpy(),
+                    'Pay Rate': pay_rate.to_numpy(),
+                    'Est. Total Pay': (total_hours * pay_rate).to_numpy(),
+                })
                 
-                display_df = merged[['Employee', 'Total Hours', 'Pay Rate', 'Est. Total Pay']].copy()
-                display_df['Est. Total Pay'] = display_df['Est. Total Pay'].apply(lambda x: f"${x:,.2f}")
-                display_df['Pay Rate'] = display_df['Pay Rate'].apply(lambda x: f"${x:,.2f}")
-                
-                st.dataframe(display_df, use_container_width=True)
+                st.dataframe(display_df, use_container_width=True, column_config=MONEY_COLUMN_CONFIG)
             else:
                 st.warning("Directory missing 'Name' or 'Pay Rate' columns. Cannot calculate pay.")
                 st.dataframe(payroll, use_container_width=True)
@@ -547,36 +687,37 @@ if check_password():
         
         # 2. Log Hours Form
         st.subheader("📝 Log New Shift")
-        with st.form("hours_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
+        @st.fragment
+        def hours_form():
+            with st.form("hours_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
             
-            # Dropdown for employee (Cached)
-            if not df_dir.empty and 'Name' in df_dir.columns:
-                employee = col1.selectbox("Employee Name", df_dir['Name'].sort_values().unique())
-            else:
-                employee = col1.text_input("Employee Name")
+                # Dropdown for employee (Cached)
+                if not df_dir.empty and 'Name' in df_dir.columns:
+                    employee = col1.selectbox("Employee Name", np.unique(df_dir['Name'].dropna()))
+                else:
+                    employee = col1.text_input("Employee Name")
             
-            # Dropdown for Contract (Cached)
-            if not df_active.empty and 'Contract Name' in df_active.columns:
-                contract = col2.selectbox("Contract / Project", df_active['Contract Name'].sort_values().unique())
-            else:
-                contract = col2.text_input("Contract / Project", value="General")
+                # Dropdown for Contract (Cached)
+                if not df_active.empty and 'Contract Name' in df_active.columns:
+                    contract = col2.selectbox("Contract / Project", np.unique(df_active['Contract Name'].dropna()))
+                else:
+                    contract = col2.text_input("Contract / Project", value="General")
 
-            col3, col4 = st.columns(2)
-            work_date = col3.date_input("Date", date.today())
-            hours = col4.number_input("Hours Worked", step=0.5)
-            task = st.text_area("Task / Description")
+                col3, col4 = st.columns(2)
+                work_date = col3.date_input("Date", date.today())
+                hours = col4.number_input("Hours Worked", step=0.5)
+                task = st.text_area("Task / Description")
             
-            submitted = st.form_submit_button("Log Hours")
-            if submitted and employee:
-                if sheet:
-                    try:
-                        ws = sheet.worksheet('Hours')
-                        ws.append_row([employee, str(work_date), hours, task, contract])
-                        st.success("Hours Logged!")
-                        clear_cache()
-                    except Exception as e:
-                        st.error(f"Error saving: {e}")
+                submitted = st.form_submit_button("Log Hours")
+                if submitted and employee:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Hours', [employee, str(work_date), hours, task, contract])
+                            saved("Hours Logged!")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+        hours_form()
         
         # 3. Raw Log
         if not df_hours.empty:
@@ -591,43 +732,45 @@ if check_password():
     elif page == "Expenses":
         st.title("💳 Expense Tracker")
         
-        df_active = load_data(sheet, "Active_Contracts")
+        dfs = load_many(sheet, PAGE_SHEETS["Expenses"])
+        df_active = with_pending(dfs["Active_Contracts"], "Active_Contracts")
         
-        with st.form("expenses_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            category = col1.selectbox("Category", ["Mileage", "Gas", "Lodging", "Food", "Materials", "Other"])
+        @st.fragment
+        def expenses_form():
+            with st.form("expenses_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                category = col1.selectbox("Category", ["Mileage", "Gas", "Lodging", "Food", "Materials", "Other"])
             
-            # Dropdown for Contract (Cached)
-            if not df_active.empty and 'Contract Name' in df_active.columns:
-                contract = col2.selectbox("Contract / Project", df_active['Contract Name'].sort_values().unique())
-            else:
-                contract = col2.text_input("Contract / Project", value="General")
+                # Dropdown for Contract (Cached)
+                if not df_active.empty and 'Contract Name' in df_active.columns:
+                    contract = col2.selectbox("Contract / Project", np.unique(df_active['Contract Name'].dropna()))
+                else:
+                    contract = col2.text_input("Contract / Project", value="General")
             
-            col3, col4 = st.columns(2)
-            amount = col3.number_input("Amount ($)", step=0.01)
-            expense_date = col4.date_input("Date", date.today())
+                col3, col4 = st.columns(2)
+                amount = col3.number_input("Amount ($)", step=0.01)
+                expense_date = col4.date_input("Date", date.today())
             
-            description = st.text_area("Description")
+                description = st.text_area("Description")
             
-            submitted = st.form_submit_button("Log Expense")
-            if submitted and amount:
-                if sheet:
-                    try:
-                        ws = sheet.worksheet('Expenses')
-                        ws.append_row([category, amount, str(expense_date), description, contract])
-                        st.success("Expense Logged!")
-                        clear_cache()
-                    except Exception as e:
-                        st.error(f"Error saving: {e}")
+                submitted = st.form_submit_button("Log Expense")
+                if submitted and amount:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Expenses', [category, amount, str(expense_date), description, contract])
+                            saved("Expense Logged!")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+        expenses_form()
 
         # Show Data
-        df = load_data(sheet, "Expenses")
+        df = with_pending(dfs["Expenses"], "Expenses")
         if not df.empty:
             if 'Date' in df.columns:
                 df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
                 df = df.sort_values('Date', ascending=False)
                 df['Date'] = df['Date'].dt.date
-            st.dataframe(df, use_container_width=True)
+            st.dataframe(df, use_container_width=True, column_config=MONEY_COLUMN_CONFIG)
         else:
             st.info("No expenses found.")
 
@@ -635,34 +778,68 @@ if check_password():
     elif page == "Mileage":
         st.title("🚗 Mileage Tracker")
         
-        with st.form("mileage_form", clear_on_submit=True):
-            col1, col2 = st.columns(2)
-            mileage_date = col1.date_input("Date", date.today())
-            license_plate = col2.text_input("License Plate")
-            vehicle = col1.text_input("Vehicle")
-            vehicle_type = col2.selectbox("Type", ["Personal", "Company", "Rental"])
+        @st.fragment
+        def mileage_form():
+            with st.form("mileage_form", clear_on_submit=True):
+                col1, col2 = st.columns(2)
+                mileage_date = col1.date_input("Date", date.today())
+                license_plate = col2.text_input("License Plate")
+                vehicle = col1.text_input("Vehicle")
+                vehicle_type = col2.selectbox("Type", ["Personal", "Company", "Rental"])
             
-            col3, col4 = st.columns(2)
-            start_odo = col3.number_input("Starting Odometer", step=0.1)
-            end_odo = col4.number_input("Ending Odometer", step=0.1)
+                col3, col4 = st.columns(2)
+                start_odo = col3.number_input("Starting Odometer", step=0.1)
+                end_odo = col4.number_input("Ending Odometer", step=0.1)
             
-            submitted = st.form_submit_button("Calculate & Log")
+                submitted = st.form_submit_button("Calculate & Log")
             
-            if submitted:
-                total_miles = end_odo - start_odo
-                reimbursement = total_miles * 0.65
-                reimbursement_str = f"${reimbursement:.2f}"
+                if submitted:
+                    total_miles = end_odo - start_odo
+                    reimbursement = total_miles * MILEAGE_RATE
+                    reimbursement_str = FORMAT_USD(reimbursement)
                 
-                st.info(f"Total Miles: {total_miles:.1f} | Reimbursement: {reimbursement_str}")
+                    st.info(f"Total Miles: {total_miles:.1f} | Reimbursement: {reimbursement_str}")
                 
-                if sheet:
+                    if sheet:
+                        try:
+                            enqueue(sheet, 'Mileage', [
+                                str(mileage_date), license_plate, vehicle, vehicle_type, 
+                                start_odo, end_odo, total_miles, reimbursement_str
+                            ])
+                            st.toast("Mileage Logged!", icon="✅")
+                        except Exception as e:
+                            st.error(f"Error saving: {e}")
+        mileage_form()
+
+        # Bulk Import
+        st.subheader("📤 Bulk Import")
+        @st.fragment
+        def mileage_import_form():
+            with st.form("mileage_import_form", clear_on_submit=True):
+                import_cols = ['Date', 'License', 'Vehicle', 'Vehicle Type', 'Starting Odometer', 'Ending Odometer']
+                uploaded = st.file_uploader(f"CSV with columns: {', '.join(import_cols)}", type="csv")
+
+                submitted = st.form_submit_button("Import Trips")
+                if submitted and uploaded is not None:
                     try:
-                        ws = sheet.worksheet('Mileage')
-                        ws.append_row([
-                            str(mileage_date), license_plate, vehicle, vehicle_type, 
-                            start_odo, end_odo, total_miles, reimbursement_str
-                        ])
-                        st.success("Mileage Logged!")
-                        clear_cache()
+                        df = pd.read_csv(uploaded, dtype={'Date': str, 'License': str, 'Vehicle': str, 'Vehicle Type': str})
+                        missing_cols = [col for col in import_cols if col not in df.columns]
+                        if missing_cols:
+                            st.error(f"CSV is missing columns: {', '.join(missing_cols)}")
+                        elif sheet:
+                            # Whole-column arithmetic instead of a Python loop per trip
+                            df = df[import_cols].copy()
+                            # One vectorized parse for both odometers; blanks and typos count as 0 like the form
+                            odometer_cols = ['Starting Odometer', 'Ending Odometer']
+                            df[odometer_cols] = df[odometer_cols].apply(pd.to_numeric, errors='coerce').fillna(0.0)
+                            df['Total Miles'] = df['Ending Odometer'] - df['Starting Odometer']
+                            df['Reimbursement Amount'] = (df['Total Miles'] * MILEAGE_RATE).map(FORMAT_USD)
+                            rows = df.astype(object).where(df.notna(), '').values.tolist()
+
+                            enqueue_rows(sheet, 'Mileage', rows)
+                            st.toast(f"{len(rows)} Trips Queued!", icon="✅")
+                        else:
+                            st.warning("Saved locally (No DB connection)")
                     except Exception as e:
-                        st.error(f"Error saving: {e}")
+                        st.error(f"Error importing: {e}")
+        mileage_import_form()
@@ -0,0 +1,398 @@
+"""Google Sheets access shared by every frontend: connection, schema, and the write queue.
+
+Nothing here imports Streamlit, so the connection and background writer are process-wide
+singletons no matter which frontend (or script) imports them.
+"""
+import os
+import json
+import queue
+import random
+import sqlite3
+import threading
+import traceback
+import time
+from contextlib import closing
+from collections import defaultdict
+
+# --- Constants ---
+SHEET_ID = '1QsIKLchwTzC0tAhdgT3JE6TFYRqWS-g5ZNyV5HYglCY'
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, 'credentials.json')
+PENDING_WRITES_DB = os.path.join(BASE_DIR, 'pending_writes.db')
+WRITE_DRAIN_WINDOW = 2 # Seconds the writer waits to gather more rows into one batch
+WRITE_BATCH_SIZE = 100 # Most rows the writer sends in one batch
+WRITE_RETRY_DELAY = 30 # Seconds before a failed batch is queued again
+WRITE_MAX_ATTEMPTS = 5 # Sends of a rejected (4xx) row before it is set aside for review
+HTTP_POOL_SIZE = 20 # Keep-alive connections kept open to the Sheets API
+HTTP_MAX_RETRIES = 5 # Retries on 429 (and 408 / 5xx for non-POSTs) before an APIError reaches the caller
+HTTP_MAX_BACKOFF = 16 # Longest single wait (seconds) between those retries
+HTTP_TIMEOUT = (5, 30) # Connect / read seconds per Sheets request, so a hung socket can't stall the writer
+VALUE_INPUT_OPTIONS = {'Mileage': 'USER_ENTERED'} # Every other tab is appended RAW
+
+# --- Worksheet Schema ---
+TABLES = {
+    'Directory': ['Name', 'Company', 'Email', 'Phone', 'Address', 'Pay Rate'],
+    'Hours': ['Employee', 'Date', 'Hours', 'Task', 'Contract'],
+    'Expenses': ['Category', 'Amount', 'Date', 'Description', 'Contract'],
+    'Mileage': ['Date', 'License', 'Vehicle', 'Vehicle Type', 'Starting Odometer', 'Ending Odometer', 'Total Miles', 'Reimbursement Amount'],
+    'Pipeline_Contracts': ['Name', 'Notice ID', 'Contract Type', 'Contact Name', 'Contact Email', 'Date Offers Due', 'Inactive Date', 'Publish Date', 'Notes'],
+    'Pipeline_Companies': ['Company Name', 'Contact Name', 'Contact Email', 'Contact Phone', 'Contacted', 'Facebook URL'],
+    'Active_Contracts': ['Contract Name', 'Agency', 'Contract Number', 'Start Date', 'End Date', 'Total Ceiling Value', 'Status', 'Notes'],
+    'Invoices': ['Invoice Number', 'Contract', 'Date Sent', 'Due Date', 'Amount', 'Status', 'Notes']
+}
+
+# --- Connection ---
+_sheet = None
+_sheet_lock = threading.Lock()
+
+def backoff_http_client():
+    """Returns a gspread HTTPClient that retries 429s, and 408s / 5xxs on non-POSTs, with backoff.
+
+    gspread's own BackOffHTTPClient keeps its retry count on the shared client (racy
+    across users and the writer thread) and never gives up once the wait hits its cap,
+    so a bounded loop with jitter is used instead. A 429 means the request was refused, so
+    it is always safe to resend; a timeout or 5xx on a POST (values:append, batchUpdate) may
+    already have been applied, so those surface to the caller instead of writing twice.
+    """
+    import gspread
+    from gspread.exceptions import APIError
+
+    class BackoffHTTPClient(gspread.HTTPClient):
+        def request(self, method, endpoint, *args, **kwargs):
+            retry_server_errors = method.lower() != 'post'
+            for attempt in range(HTTP_MAX_RETRIES + 1):
+                try:
+                    return super().request(method, endpoint, *args, **kwargs)
+                except APIError as e:
+                    retryable = e.code == 429 or (retry_server_errors and (e.code == 408 or e.code >= 500))
+                    if attempt == HTTP_MAX_RETRIES or not retryable:
+                        raise
+                    time.sleep(min(HTTP_MAX_BACKOFF, 2 ** attempt) + random.random())
+
+    return BackoffHTTPClient
+
+def open_spreadsheet(service_account_info=None):
+    """Authorizes a client and opens the spreadsheet. Raises if no credentials load."""
+    # Imported here so importing this module doesn't load the Google client stack
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from requests.adapters import HTTPAdapter
+
+    creds = None
+    errors = []
+
+    # 1. Try the service account info passed in (e.g. Streamlit secrets)
+    if service_account_info:
+        try:
+            creds = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
+        except Exception as e:
+            errors.append(f"Error loading secrets: {e}")
+
+    # 2. Fallback to Local File
+    if not creds and os.path.exists(SERVICE_ACCOUNT_FILE):
+        try:
+            creds = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+        except Exception as e:
+            errors.append(f"Error loading local credentials: {e}")
+
+    if not creds:
+        raise RuntimeError(" ".join(errors) or "No credentials found! Please set up st.secrets or credentials.json.")
+
+    client = gspread.authorize(creds, http_client=backoff_http_client())
+    client.set_timeout(HTTP_TIMEOUT)
+    # This one session serves every user plus the writer thread; widen requests' default
+    # 10-connection pool so concurrent calls keep reusing warm TLS connections
+    client.http_client.session.mount('https://', HTTPAdapter(pool_maxsize=HTTP_POOL_SIZE))
+    return client.open_by_key(SHEET_ID)
+
+def get_sheet(service_account_info=None):
+    """Returns the process-wide Spreadsheet handle, opening it on first use.
+
+    The client keeps its AuthorizedSession (and HTTPS connection pool) alive across
+    requests; google-auth refreshes the access token on demand. A failed open is not
+    cached, so the next call tries again.
+    """
+    global _sheet
+    with _sheet_lock:
+        if _sheet is None:
+            _sheet = open_spreadsheet(service_account_info)
+        return _sheet
+
+def init_sheet(sheet):
+    """Ensures the necessary worksheets and headers exist using batched API calls."""
+    if not sheet:
+        return
+
+    # 1. One metadata read for the existing tabs, one batchUpdate for any missing ones
+    existing_titles = {ws['properties']['title'] for ws in sheet.fetch_sheet_metadata()['sheets']}
+    missing = [name for name in TABLES if name not in existing_titles]
+    if missing:
+        sheet.batch_update({'requests': [
+            {'addSheet': {'properties': {'title': name, 'gridProperties': {'rowCount': 100, 'columnCount': 20}}}}
+            for name in missing
+        ]})
+
+    # 2. One batchGet for the header rows of the tabs that already existed;
+    # tabs created above are known to be empty, so they are not read back
+    existing = [name for name in TABLES if name in existing_titles]
+    header_rows = sheet.values_batch_get([f"'{name}'!1:1" for name in existing])['valueRanges'] if existing else []
+    existing_headers = {name: header_row.get('values', [[]])[0] for name, header_row in zip(existing, header_rows)}
+
+    # 3. One batchUpdate for every empty or incomplete header row
+    updates = []
+    for name, headers in TABLES.items():
+        current = existing_headers.get(name, [])
+        missing_headers = [header for header in headers if header not in current]
+        if missing_headers:
+            updates.append({'range': f"'{name}'!A1", 'values': [current + missing_headers]})
+
+    if updates:
+        sheet.values_batch_update({'valueInputOption': 'RAW', 'data': updates})
+
+# --- Background Writer ---
+_write_queue = None
+_writer_lock = threading.Lock() # Also guards _pending
+_pending = defaultdict(dict) # {worksheet_name: {row_id: row}} mirror of the pending table, for reads
+
+def pending_writes_db():
+    """Opens the SQLite file that keeps queued rows safe until Sheets accepts them."""
+    return sqlite3.connect(PENDING_WRITES_DB)
+
+def create_pending_tables(conn):
+    """Creates the pending and failed tables; start_writer runs this once per process."""
+    conn.execute("CREATE TABLE IF NOT EXISTS pending (id INTEGER PRIMARY KEY AUTOINCREMENT, worksheet TEXT, row TEXT)")
+    # Rows that may already be in Sheets, or that Sheets keeps rejecting; kept for a person to check
+    conn.execute("CREATE TABLE IF NOT EXISTS failed (id INTEGER PRIMARY KEY, worksheet TEXT, row TEXT, error TEXT)")
+
+def drop_pending(items):
+    """Removes written or set-aside (row_id, worksheet_name, row) items from the in-memory mirror."""
+    with _writer_lock:
+        for row_id, name, _ in items:
+            _pending[name].pop(row_id, None)
+
+def build_append_urls(sheet):
+    """Precomputes the full values:append URL, query string included, for every worksheet."""
+    from urllib.parse import quote, urlencode
+    from gspread.urls import SPREADSHEET_VALUES_APPEND_URL
+
+    return {
+        name: SPREADSHEET_VALUES_APPEND_URL % (sheet.id, quote(f"'{name}'!A1")) + '?' + urlencode({
+            'valueInputOption': VALUE_INPUT_OPTIONS.get(name, 'RAW'), 'insertDataOption': 'INSERT_ROWS'
+        })
+        for name in TABLES
+    }
+
+def never_sent(error):
+    """True when a requests error happened before the request left this machine, so resending is safe.
+
+    Only a refused or unresolvable connection, or a connect timeout, qualifies. A server closing
+    the connection after reading the request also raises ConnectionError, so anything else is
+    treated like a 5xx: it may already have been applied.
+    """
+    from requests.exceptions import ConnectTimeout
+    from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+    if isinstance(error, ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+def append_with_backoff(sheet, worksheet_name, rows, url=None):
+    """Appends rows in one values:append call, backing off on 429s. Sends each batch once otherwise."""
+    import requests
+    from gspread.exceptions import APIError
+
+    # Fast path: POST straight to the precomputed URL on the shared session
+    if url:
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            try:
+                response = sheet.client.session.post(url, json={'values': rows}, timeout=HTTP_TIMEOUT)
+            except requests.ConnectionError as e:
+                if not never_sent(e):
+                    raise
+                break # Never reached the API; send through gspread below
+            if response.ok:
+                return
+            # Anything but a 429 may have been applied, so it surfaces rather than being resent
+            if response.status_code != 429 or attempt == HTTP_MAX_RETRIES:
+                raise APIError(response)
+            time.sleep(min(HTTP_MAX_BACKOFF, 2 ** attempt) + random.random())
+
+    # Fallback through gspread, whose backoff client retries 429s.
+    # RAW stores the form text as typed and skips Sheets' formula/locale parsing;
+    # Mileage keeps USER_ENTERED so the reimbursement string lands as a currency number.
+    sheet.values_append(
+        f"'{worksheet_name}'!A1",
+        {'valueInputOption': VALUE_INPUT_OPTIONS.get(worksheet_name, 'RAW'), 'insertDataOption': 'INSERT_ROWS'},
+        {'values': rows},
+    )
+
+def failure_kind(error):
+    """Sorts a failed append: 'retry' is safe to resend, 'ambiguous' may have been applied, else 'rejected'."""
+    import requests
+    from gspread.exceptions import APIError
+
+    if isinstance(error, APIError):
+        status = error.response.status_code
+        if status == 429:
+            return 'retry'
+        return 'ambiguous' if status == 408 or status >= 500 else 'rejected'
+    if isinstance(error, requests.RequestException):
+        return 'retry' if never_sent(error) else 'ambiguous'
+    return 'rejected'
+
+def set_aside(items, error):
+    """Moves (row_id, worksheet_name, row) items from the pending table to the failed table."""
+    with closing(pending_writes_db()) as conn, conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO failed (id, worksheet, row, error) VALUES (?, ?, ?, ?)",
+            [(row_id, name, json.dumps(row), repr(error)) for row_id, name, row in items],
+        )
+        conn.executemany("DELETE FROM pending WHERE id = ?", [(row_id,) for row_id, _, _ in items])
+    drop_pending(items)
+
+def failed_rows():
+    """Returns (worksheet_name, row, error) for every row the writer set aside, oldest first."""
+    with closing(pending_writes_db()) as conn:
+        return [
+            (name, json.loads(row), error)
+            for name, row, error in conn.execute("SELECT worksheet, row, error FROM failed ORDER BY id")
+        ]
+
+def write_batch(sheet, items, append_urls, on_written=None):
+    """Writes a drained batch of (row_id, worksheet_name, row) items, grouped per worksheet.
+
+    Returns (items, error) for each worksheet whose append failed; the other worksheets are written.
+    """
+    grouped = defaultdict(list)
+    for item in items:
+        grouped[item[1]].append(item)
+
+    failures = []
+    for name, group in grouped.items():
+        try:
+            append_with_backoff(sheet, name, [row for _, _, row in group], append_urls.get(name))
+        except Exception as e:
+            failures.append((group, e))
+            continue
+        with closing(pending_writes_db()) as conn, conn:
+            conn.executemany("DELETE FROM pending WHERE id = ?", [(row_id,) for row_id, _, _ in group])
+        drop_pending(group)
+        if on_written:
+            on_written(name)
+    return failures
+
+def start_writer(sheet, on_written=None):
+    """Starts the daemon thread that drains the write queue into Google Sheets, once per process.
+
+    Rows left in the SQLite file by a previous process are queued again first. A failed send is
+    queued again only when resending can't duplicate rows (see failure_kind); other failures are
+    moved to the failed table, readable with failed_rows().
+    on_written(worksheet_name) runs after each worksheet's rows land, e.g. to drop cached reads.
+    """
+    global _write_queue
+    with _writer_lock:
+        if _write_queue is not None:
+            return _write_queue
+
+        append_urls = build_append_urls(sheet)
+        write_queue = queue.Queue()
+        with closing(pending_writes_db()) as conn, conn:
+            create_pending_tables(conn)
+            for row_id, name, row in conn.execute("SELECT id, worksheet, row FROM pending ORDER BY id"):
+                row = json.loads(row)
+                _pending[name][row_id] = row
+                write_queue.put((row_id, name, row))
+
+        attempts = defaultdict(int) # Rejected sends per row id
+
+        def run():
+            while True:
+                # Block for the first row, then gather whatever else arrives in the drain window
+                items = [write_queue.get()]
+                deadline = time.monotonic() + WRITE_DRAIN_WINDOW
+                while len(items) < WRITE_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        items.append(write_queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                retry = []
+                try:
+                    for group, error in write_batch(sheet, items, append_urls, on_written):
+                        traceback.print_exception(error)
+                        kind = failure_kind(error)
+                        if kind == 'rejected':
+                            for row_id, _, _ in group:
+                                attempts[row_id] += 1
+                        # Resending an ambiguous failure could duplicate rows, and a row Sheets keeps
+                        # rejecting would block the queue, so both go to the failed table instead
+                        if kind == 'ambiguous' or any(attempts[row_id] >= WRITE_MAX_ATTEMPTS for row_id, _, _ in group):
+                            set_aside(group, error)
+                            for row_id, _, _ in group:
+                                attempts.pop(row_id, None)
+                        else:
+                            retry.extend(group)
+                except Exception:
+                    # Bookkeeping failed (e.g. SQLite); the rows stay pending and are sent again on restart
+                    traceback.print_exc()
+
+                if retry:
+                    # Still persisted in SQLite; try them again after a pause
+                    time.sleep(WRITE_RETRY_DELAY)
+                    for item in retry:
+                        write_queue.put(item)
+                for _ in items:
+                    write_queue.task_done()
+
+        thread = threading.Thread(target=run, name="sheets-writer", daemon=True)
+        thread.start()
+        _write_queue = write_queue
+        return write_queue
+
+def enqueue_rows(sheet, worksheet_name, rows):
+    """Persists rows and hands them to the background writer instead of writing them inline."""
+    # Start the writer first so its recovery pass doesn't pick these rows up as well
+    write_queue = start_writer(sheet)
+    with closing(pending_writes_db()) as conn, conn:
+        row_ids = [
+            conn.execute(
+                "INSERT INTO pending (worksheet, row) VALUES (?, ?)", (worksheet_name, json.dumps(row))
+            ).lastrowid
+            for row in rows
+        ]
+    # Mirror before queueing, so the writer can't drop a row that hasn't been added yet
+    with _writer_lock:
+        _pending[worksheet_name].update(zip(row_ids, rows))
+    for row_id, row in zip(row_ids, rows):
+        write_queue.put((row_id, worksheet_name, row))
+
+def enqueue(sheet, worksheet_name, row):
+    """Queues a single row for the background writer."""
+    enqueue_rows(sheet, worksheet_name, [row])
+
+def pending_rows(worksheet_name):
+    """Returns the rows still waiting for the writer for one worksheet, oldest first. No SQLite read."""
+    with _writer_lock:
+        return list(_pending.get(worksheet_name, {}).values())
+
+def flush(timeout=None):
+    """Blocks until the writer has sent every queued row. Returns False if timeout runs out first."""
+    write_queue = _write_queue
+    if write_queue is None:
+        return True
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with write_queue.all_tasks_done:
+        while write_queue.unfinished_tasks:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            write_queue.all_tasks_done.wait(remaining)
+    return True
@@ -1,12 +1,7 @@
-import os
 import traceback
 import gspread
 from google.oauth2.service_account import Credentials
-
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-SERVICE_ACCOUNT_FILE = os.path.join(BASE_DIR, 'credentials.json')
-SHEET_ID = '1QsIKLchwTzC0tAhdgT3JE6TFYRqWS-g5ZNyV5HYglCY'
-SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+from sheets_core import SERVICE_ACCOUNT_FILE, SHEET_ID, SCOPES
 
 print(f"Testing connection with file: {SERVICE_ACCOUNT_FILE}")
 
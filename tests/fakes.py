@@ -0,0 +1,105 @@
+"""In-memory stand-ins for the Sheets API shared by the tests."""
+import os
+import sys
+import tempfile
+import time
+import traceback
+from collections import defaultdict
+from types import SimpleNamespace
+from unittest import mock
+from urllib.parse import unquote
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import sheets_core
+
+
+def response(status):
+    """Returns a requests.Response with the given status and a Sheets-style error body."""
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = b'{"error": {"code": %d, "message": "fake", "status": "FAKE"}}' % status
+    return resp
+
+
+class FakeSession:
+    """Answers values:append POSTs from a per-worksheet script of statuses or exceptions."""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.script = defaultdict(list) # {worksheet_name: [status or exception, ...]}, then 200s
+        self.posts = [] # (worksheet_name, status or exception) per POST, in order
+        self.timeouts = []
+
+    def post(self, url, json=None, timeout=None):
+        name = unquote(url).split("/values/'")[1].split("'!A1:append")[0]
+        outcome = self.script[name].pop(0) if self.script[name] else 200
+        self.posts.append((name, outcome))
+        self.timeouts.append(timeout)
+        if isinstance(outcome, Exception):
+            raise outcome
+        if outcome == 200:
+            self.sheet.values[name].extend(json['values'])
+        return response(outcome)
+
+
+class FakeSheet:
+    """Just enough of gspread.Spreadsheet for the app and the writer: values live in a dict."""
+    id = 'test-sheet'
+
+    def __init__(self, values=None):
+        if values is None:
+            values = {name: [list(headers)] for name, headers in sheets_core.TABLES.items()}
+        self.values = values
+        self.calls = [] # (method name, argument) per API call, in order
+        self.client = SimpleNamespace(session=FakeSession(self))
+
+    def fetch_sheet_metadata(self):
+        self.calls.append(('fetch_sheet_metadata', None))
+        return {'sheets': [{'properties': {'title': name}} for name in self.values]}
+
+    def values_batch_get(self, ranges):
+        self.calls.append(('values_batch_get', ranges))
+        value_ranges = []
+        for rng in ranges:
+            name = rng.split('!')[0].strip("'")
+            rows = self.values[name][:1] if rng.endswith('!1:1') else self.values[name]
+            value_ranges.append({'range': rng, 'values': [list(row) for row in rows]})
+        return {'valueRanges': value_ranges}
+
+    def batch_update(self, body):
+        self.calls.append(('batch_update', body))
+        for request in body['requests']:
+            self.values[request['addSheet']['properties']['title']] = []
+        return {}
+
+    def values_batch_update(self, body):
+        self.calls.append(('values_batch_update', body))
+        return {}
+
+    def values_append(self, range_name, params, body):
+        self.calls.append(('values_append', range_name))
+        self.values[range_name.split('!')[0].strip("'")].extend(body['values'])
+        return {}
+
+
+def isolate_writer(test, **overrides):
+    """Gives a test its own pending DB, queue and mirror, with no retry waits. Undone on cleanup."""
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    patches = {
+        'PENDING_WRITES_DB': os.path.join(tmp.name, 'pending_writes.db'),
+        '_write_queue': None,
+        '_pending': defaultdict(dict),
+        'WRITE_RETRY_DELAY': 0,
+        'WRITE_DRAIN_WINDOW': 0.01,
+        'time': SimpleNamespace(sleep=lambda seconds: None, monotonic=time.monotonic),
+        # Expected send failures are asserted on, not printed; bookkeeping errors still print
+        'traceback': SimpleNamespace(print_exception=lambda error: None, print_exc=traceback.print_exc),
+        **overrides,
+    }
+    patcher = mock.patch.multiple(sheets_core, **patches)
+    patcher.start()
+    test.addCleanup(patcher.stop)
@@ -0,0 +1,90 @@
+import hashlib
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from fakes import FakeSheet
+import app # Outside `streamlit run` the login check fails, so only the helpers are defined
+
+
+class ValuesToFrameTest(unittest.TestCase):
+    def test_empty_values(self):
+        self.assertTrue(app.values_to_frame([]).empty)
+        df = app.values_to_frame([['Name', 'Amount']])
+        self.assertEqual(list(df.columns), ['Name', 'Amount'])
+        self.assertEqual(len(df), 0)
+
+    def test_ragged_rows_are_squared_to_the_header(self):
+        df = app.values_to_frame([['Name', 'Company', 'Email'], ['Bob'], ['Al', 'Acme', 'al@x', 'extra']])
+        self.assertEqual(df.values.tolist(), [['Bob', '', ''], ['Al', 'Acme', 'al@x']])
+
+    def test_known_columns_are_parsed(self):
+        df = app.values_to_frame([
+            ['Invoice Number', 'Amount', 'Due Date', 'Status', 'Hours'],
+            ['I1', '$1,200.50', '2025-01-02', 'Sent', '8'],
+            ['I2', 'n/a', '', 'Paid', 'x'],
+        ])
+        self.assertEqual(df['Amount'].iloc[0], 1200.5)
+        self.assertTrue(np.isnan(df['Amount'].iloc[1]))
+        self.assertEqual(df['Due Date'].iloc[0], pd.Timestamp('2025-01-02'))
+        self.assertTrue(pd.isna(df['Due Date'].iloc[1]))
+        self.assertIsInstance(df['Status'].dtype, pd.CategoricalDtype)
+        self.assertEqual(df['Hours'].iloc[0], 8.0)
+        self.assertTrue(np.isnan(df['Hours'].iloc[1]))
+        self.assertEqual(df['Invoice Number'].tolist(), ['I1', 'I2'])
+
+
+class InvalidateTest(unittest.TestCase):
+    def setUp(self):
+        st.cache_data.clear()
+        self.addCleanup(st.cache_data.clear)
+        self.sheet = FakeSheet()
+
+    def reads(self):
+        return [ranges for name, ranges in self.sheet.calls if name == 'values_batch_get']
+
+    def test_only_batches_with_the_written_sheet_are_dropped(self):
+        app.load_many(self.sheet, app.PAGE_SHEETS["Hours"])
+        app.load_many(self.sheet, ("Directory",))
+        app.load_many(self.sheet, app.PAGE_SHEETS["Pipeline"])
+        self.assertEqual(len(self.reads()), 3)
+
+        app.invalidate("Hours")
+        app.load_many(self.sheet, app.PAGE_SHEETS["Hours"])
+        app.load_many(self.sheet, ("Directory",))
+        app.load_many(self.sheet, app.PAGE_SHEETS["Pipeline"])
+        self.assertEqual(self.reads()[3:], [[f"'{name}'" for name in app.PAGE_SHEETS["Hours"]]])
+
+        app.invalidate("Directory")
+        app.load_many(self.sheet, ("Directory",))
+        app.load_many(self.sheet, app.PAGE_SHEETS["Hours"])
+        self.assertEqual(len(self.reads()), 6)
+
+
+class AdminPwHashTest(unittest.TestCase):
+    def setUp(self):
+        app.admin_pw_hash.clear()
+        self.addCleanup(app.admin_pw_hash.clear)
+
+    def pw_hash(self, secrets):
+        with mock.patch.object(st, 'secrets', secrets):
+            return app.admin_pw_hash()
+
+    def test_default_without_secret(self):
+        self.assertEqual(self.pw_hash({}), app.ADMIN_PW_SHA256)
+
+    def test_secret_digest(self):
+        digest = hashlib.sha256(b'new-password').digest()
+        self.assertEqual(self.pw_hash({'admin_pw_sha256': digest.hex()}), digest)
+
+    def test_malformed_secret_raises_instead_of_falling_back(self):
+        for secret in ['sha256:' + 'ab' * 32, 'abc', 'ab' * 31, 'zz' * 32, 123]:
+            with self.subTest(secret=secret), self.assertRaises(ValueError):
+                self.pw_hash({'admin_pw_sha256': secret})
+
+
+if __name__ == '__main__':
+    unittest.main()
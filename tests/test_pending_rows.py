@@ -0,0 +1,47 @@
+import os
+import threading
+import unittest
+
+from streamlit.testing.v1 import AppTest
+
+from fakes import ROOT, FakeSheet, isolate_writer
+
+
+class PendingRowsTest(unittest.TestCase):
+    def setUp(self):
+        self.sheet = FakeSheet()
+        self.sheet.values['Directory'].append(['Bob', 'Acme', 'bob@example.com', '555', 'Main St', '20'])
+        # The writer holds every batch until cleanup, so queued rows stay pending and only
+        # with_pending can show them
+        release = threading.Event()
+        self.addCleanup(release.set)
+        isolate_writer(
+            self,
+            get_sheet=lambda service_account_info=None: self.sheet,
+            write_batch=lambda *args: release.wait() and [],
+        )
+
+    def test_queued_row_shows_on_next_render(self):
+        at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=30)
+        at.secrets['gcp_service_account'] = {'type': 'service_account'}
+        at.run()
+        at.text_input(key='username').input('admin')
+        at.text_input(key='password').input('battlebound2025')
+        at.button[0].click().run()
+
+        at.sidebar.radio[0].set_value('Directory').run()
+        self.assertEqual(at.dataframe[0].value['Name'].tolist(), ['Bob'])
+
+        at.text_input[0].input('New Guy')
+        next(button for button in at.button if button.label == 'Save Contact').click().run()
+
+        self.assertFalse(at.exception)
+        self.assertEqual(sorted(at.dataframe[0].value['Name'].tolist()), ['Bob', 'New Guy'])
+        self.assertEqual(len(self.sheet.values['Directory']), 2) # Still only queued, not written
+
+        at.sidebar.radio[0].set_value('Hours').run()
+        self.assertIn('New Guy', at.selectbox[0].options)
+
+
+if __name__ == '__main__':
+    unittest.main()
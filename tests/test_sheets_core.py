@@ -0,0 +1,198 @@
+import http.client
+import json
+import sqlite3
+import unittest
+from contextlib import closing
+from unittest import mock
+
+import gspread
+import requests
+from gspread.exceptions import APIError
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from fakes import FakeSheet, isolate_writer, response
+import sheets_core
+
+REFUSED = requests.ConnectionError(MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused')))
+DROPPED = requests.ConnectionError(ProtocolError('Connection aborted.', http.client.RemoteDisconnected('closed')))
+
+
+class BackoffHTTPClientTest(unittest.TestCase):
+    def send(self, method, status):
+        """Returns how many times one request is sent when every attempt gets status."""
+        attempts = []
+
+        def request(client, method, endpoint, *args, **kwargs):
+            attempts.append(method)
+            raise APIError(response(status))
+
+        client_class = sheets_core.backoff_http_client()
+        client = client_class.__new__(client_class)
+        with mock.patch.object(gspread.HTTPClient, 'request', request), \
+                mock.patch.object(sheets_core.time, 'sleep'):
+            with self.assertRaises(APIError):
+                client.request(method, 'https://sheets.example/')
+        return len(attempts)
+
+    def test_429_is_retried_for_every_method(self):
+        self.assertEqual(self.send('post', 429), sheets_core.HTTP_MAX_RETRIES + 1)
+        self.assertEqual(self.send('get', 429), sheets_core.HTTP_MAX_RETRIES + 1)
+
+    def test_server_errors_are_retried_only_for_reads(self):
+        self.assertEqual(self.send('get', 503), sheets_core.HTTP_MAX_RETRIES + 1)
+        self.assertEqual(self.send('get', 408), sheets_core.HTTP_MAX_RETRIES + 1)
+        self.assertEqual(self.send('post', 503), 1)
+        self.assertEqual(self.send('post', 408), 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.assertEqual(self.send('get', 400), 1)
+
+
+class AppendWithBackoffTest(unittest.TestCase):
+    def setUp(self):
+        isolate_writer(self)
+        self.sheet = FakeSheet()
+        self.session = self.sheet.client.session
+        self.url = sheets_core.build_append_urls(self.sheet)['Hours']
+
+    def append(self):
+        sheets_core.append_with_backoff(self.sheet, 'Hours', [['Al', '2025-01-02', '8', '', 'C1']], self.url)
+
+    def test_fast_path_posts_once_with_a_timeout(self):
+        self.append()
+        self.assertEqual(self.session.posts, [('Hours', 200)])
+        self.assertEqual(self.session.timeouts, [sheets_core.HTTP_TIMEOUT])
+        self.assertEqual(len(self.sheet.values['Hours']), 2)
+
+    def test_429_backs_off_and_resends_the_same_post(self):
+        self.session.script['Hours'] = [429, 429]
+        self.append()
+        self.assertEqual([outcome for _, outcome in self.session.posts], [429, 429, 200])
+        self.assertNotIn('values_append', [name for name, _ in self.sheet.calls])
+
+    def test_server_error_raises_without_a_second_send(self):
+        self.session.script['Hours'] = [503]
+        with self.assertRaises(APIError):
+            self.append()
+        self.assertEqual(len(self.session.posts), 1)
+        self.assertNotIn('values_append', [name for name, _ in self.sheet.calls])
+
+    def test_never_sent_connection_falls_back_to_gspread_once(self):
+        self.session.script['Hours'] = [REFUSED]
+        self.append()
+        self.assertEqual([name for name, _ in self.sheet.calls], ['values_append'])
+        self.assertEqual(len(self.sheet.values['Hours']), 2)
+
+    def test_dropped_connection_raises_without_a_second_send(self):
+        self.session.script['Hours'] = [DROPPED]
+        with self.assertRaises(requests.ConnectionError):
+            self.append()
+        self.assertEqual(self.sheet.calls, [])
+
+    def test_never_sent(self):
+        self.assertTrue(sheets_core.never_sent(REFUSED))
+        self.assertTrue(sheets_core.never_sent(requests.exceptions.ConnectTimeout()))
+        self.assertFalse(sheets_core.never_sent(DROPPED))
+        self.assertFalse(sheets_core.never_sent(requests.exceptions.ReadTimeout()))
+
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        isolate_writer(self)
+        self.sheet = FakeSheet()
+        self.session = self.sheet.client.session
+
+    def posts(self, name):
+        return [outcome for posted, outcome in self.session.posts if posted == name]
+
+    def test_rows_are_written_and_leave_the_pending_mirror(self):
+        sheets_core.enqueue(self.sheet, 'Hours', ['Al', '2025-01-02', '8', '', 'C1'])
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(self.sheet.values['Hours'][1:], [['Al', '2025-01-02', '8', '', 'C1']])
+        self.assertEqual(sheets_core.pending_rows('Hours'), [])
+
+    def test_429_is_queued_again_until_written(self):
+        self.session.script['Hours'] = [429] * (sheets_core.HTTP_MAX_RETRIES + 1)
+        sheets_core.enqueue(self.sheet, 'Hours', ['Al', '2025-01-02', '8', '', 'C1'])
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(self.posts('Hours')[-1], 200)
+        self.assertEqual(len(self.sheet.values['Hours']), 2)
+        self.assertEqual(sheets_core.failed_rows(), [])
+
+    def test_ambiguous_failure_is_set_aside_not_resent(self):
+        # A 5xx may mean Sheets stored the rows anyway; resending could duplicate them
+        self.session.script['Hours'] = [503]
+        sheets_core.enqueue(self.sheet, 'Hours', ['Al', '2025-01-02', '8', '', 'C1'])
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(self.posts('Hours'), [503])
+        self.assertEqual(self.sheet.calls, [])
+        self.assertEqual([(name, row) for name, row, _ in sheets_core.failed_rows()],
+                         [('Hours', ['Al', '2025-01-02', '8', '', 'C1'])])
+        self.assertEqual(sheets_core.pending_rows('Hours'), [])
+
+    def test_dropped_connection_is_set_aside_not_resent(self):
+        self.session.script['Hours'] = [DROPPED]
+        sheets_core.enqueue(self.sheet, 'Hours', ['Al', '2025-01-02', '8', '', 'C1'])
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(len(self.posts('Hours')), 1)
+        self.assertEqual(len(sheets_core.failed_rows()), 1)
+
+    def test_rejected_row_is_capped_and_does_not_block_later_rows(self):
+        self.session.script['Expenses'] = [400] * 100
+        sheets_core.enqueue(self.sheet, 'Expenses', ['Travel', 'bad', '2025-01-02', '', 'C1'])
+        sheets_core.enqueue(self.sheet, 'Directory', ['Bob', '', '', '', '', '20'])
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(self.posts('Expenses'), [400] * sheets_core.WRITE_MAX_ATTEMPTS)
+        self.assertEqual(self.sheet.values['Directory'][1:], [['Bob', '', '', '', '', '20']])
+        self.assertEqual([name for name, _, _ in sheets_core.failed_rows()], ['Expenses'])
+
+    def test_rows_left_by_a_previous_process_are_sent_on_start(self):
+        with closing(sqlite3.connect(sheets_core.PENDING_WRITES_DB)) as conn, conn:
+            sheets_core.create_pending_tables(conn)
+            conn.executemany("INSERT INTO pending (worksheet, row) VALUES (?, ?)", [
+                ('Hours', json.dumps(['Al', '2025-01-02', '8', '', 'C1'])),
+                ('Hours', json.dumps(['Bob', '2025-01-03', '4', '', 'C1'])),
+            ])
+
+        sheets_core.start_writer(self.sheet)
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual([row[0] for row in self.sheet.values['Hours'][1:]], ['Al', 'Bob'])
+        with closing(sqlite3.connect(sheets_core.PENDING_WRITES_DB)) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM pending").fetchone(), (0,))
+
+    def test_on_written_runs_per_worksheet(self):
+        written = []
+        sheets_core.start_writer(self.sheet, on_written=written.append)
+        sheets_core.enqueue_rows(self.sheet, 'Hours', [['Al', '2025-01-02', '8', '', 'C1']] * 2)
+        self.assertTrue(sheets_core.flush(timeout=10))
+        self.assertEqual(written, ['Hours'])
+        self.assertEqual(len(self.posts('Hours')), 1) # Both rows in one append
+
+
+class InitSheetTest(unittest.TestCase):
+    def test_missing_tabs_and_headers_are_added_in_one_call_each(self):
+        sheet = FakeSheet({
+            'Directory': [list(sheets_core.TABLES['Directory'])],
+            'Hours': [['Employee', 'Date']],
+        })
+        sheets_core.init_sheet(sheet)
+
+        self.assertEqual([name for name, _ in sheet.calls],
+                         ['fetch_sheet_metadata', 'batch_update', 'values_batch_get', 'values_batch_update'])
+        added = [request['addSheet']['properties']['title'] for request in sheet.calls[1][1]['requests']]
+        self.assertEqual(added, [name for name in sheets_core.TABLES if name not in ('Directory', 'Hours')])
+        # Only the tabs that already existed are read back
+        self.assertEqual(sheet.calls[2][1], ["'Directory'!1:1", "'Hours'!1:1"])
+        updates = {update['range']: update['values'][0] for update in sheet.calls[3][1]['data']}
+        self.assertNotIn("'Directory'!A1", updates)
+        self.assertEqual(updates["'Hours'!A1"], sheets_core.TABLES['Hours'])
+        self.assertEqual(updates["'Invoices'!A1"], sheets_core.TABLES['Invoices'])
+
+    def test_complete_sheet_is_only_read(self):
+        sheet = FakeSheet()
+        sheets_core.init_sheet(sheet)
+        self.assertEqual([name for name, _ in sheet.calls], ['fetch_sheet_metadata', 'values_batch_get'])
+
+
+if __name__ == '__main__':
+    unittest.main()